@@ -13,9 +13,417 @@ sys.path.append(str(Path(__file__).parent.parent / "src"))
 from aws_connector.s3_client import S3Connector
 from azure_connector.adls_client import ADLSConnector
 from utils.file_converter import convert_to_parquet, get_file_extension
-from utils.checksum import md5_file
+from utils.checksum import HashingReader, available_hash_algorithms, new_hasher
 from utils.file_manager import TempFileManager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import os
+import queue
+
+# Workers per pipeline stage. Downloads and uploads are network-bound (S3 throughput scales
+# with connections up to ~10); conversion is CPU-bound, so keep it near the core count.
+DOWNLOAD_WORKERS = 8
+CONVERT_WORKERS = min(4, os.cpu_count() or 1)
+UPLOAD_WORKERS = 8
+# ADLS upload tuning: blocks match the S3 part size. The SDK holds a whole block in memory
+# per in-flight PUT (always for streamed/hashed uploads, which can't seek), so parallel PUTs
+# per file are sized to keep UPLOAD_WORKERS * concurrency * chunk within the budget
+# (8 files * 4 blocks * 16 MB = 512 MB).
+ADLS_UPLOAD_MEMORY_BUDGET = 512 * 1024 * 1024
+ADLS_UPLOAD_CHUNK_SIZE = 16 * 1024 * 1024
+ADLS_UPLOAD_CONCURRENCY = max(1, ADLS_UPLOAD_MEMORY_BUDGET // (UPLOAD_WORKERS * ADLS_UPLOAD_CHUNK_SIZE))
+# Remote checksums are network-bound (each one re-reads the file from ADLS)
+REMOTE_VERIFY_WORKERS = 16
+
+# Verification checksum used unless the user picks another; falls back to MD5 without blake3
+DEFAULT_HASH_ALGO = 'blake3'
+
+HASH_LABELS = {
+    'md5': "MD5",
+    'blake2b': "BLAKE2b",
+    'blake3': "BLAKE3",
+}
+
+PIPELINE_STAGES = ('download', 'convert', 'upload')
+
+# Source formats convert_to_parquet accepts; everything else (incl. Parquet) is uploaded as-is
+CONVERTIBLE_EXTENSIONS = frozenset({'csv', 'json'})
+
+# How long (seconds) an S3 listing is reused before "List Files" queries S3 again
+LIST_CACHE_TTL = 60
+
+
+class ListingError(Exception):
+    """Raised by _cached_list so failed listings are not cached."""
+
+
+def _credentials_hash(*parts):
+    """SHA-256 of the credentials, so caches are keyed per account without holding plaintext keys."""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class ConnectorError(Exception):
+    """Raised by the _make_* factories so failed connections are not cached."""
+
+
+@st.cache_resource(show_spinner=False)
+def _make_s3(cred_hash, region, _access_key_id, _secret_access_key):
+    """
+    Build and connect an S3Connector once per (credentials hash, region).
+    
+    The connected client (endpoint resolution, signer and pooled TLS connections)
+    is kept across Streamlit reruns instead of being rebuilt each time.
+    """
+    s3_connector = S3Connector(
+        access_key_id=_access_key_id,
+        secret_access_key=_secret_access_key,
+        region=region
+    )
+    success, message = s3_connector.connect()
+    if not success:
+        raise ConnectorError(message)
+    return s3_connector
+
+
+@st.cache_resource(show_spinner=False)
+def _make_adls(cred_hash, account_name, _account_key):
+    """Build and connect an ADLSConnector once per (credentials hash, account)."""
+    adls_connector = ADLSConnector(
+        account_name=account_name,
+        account_key=_account_key,
+        max_concurrency=ADLS_UPLOAD_CONCURRENCY,
+        upload_chunk_size=ADLS_UPLOAD_CHUNK_SIZE
+    )
+    success, message = adls_connector.connect()
+    if not success:
+        raise ConnectorError(message)
+    return adls_connector
+
+
+def _get_s3_connector(access_key_id, secret_access_key, region):
+    """
+    Return a connected S3Connector for these credentials, reusing the cached one if possible.
+    
+    Returns:
+        Tuple of (success, S3Connector or None, message)
+    """
+    try:
+        s3_connector = _make_s3(
+            _credentials_hash(access_key_id, secret_access_key, region),
+            region, access_key_id, secret_access_key
+        )
+    except ConnectorError as e:
+        return False, None, str(e)
+    return True, s3_connector, "Connected successfully"
+
+
+def _get_adls_connector(account_name, account_key):
+    """
+    Return a connected ADLSConnector for these credentials, reusing the cached one if possible.
+    
+    Returns:
+        Tuple of (success, ADLSConnector or None, message)
+    """
+    try:
+        adls_connector = _make_adls(_credentials_hash(account_name, account_key), account_name, account_key)
+    except ConnectorError as e:
+        return False, None, str(e)
+    return True, adls_connector, "Connected successfully"
+
+
+@st.cache_data(ttl=LIST_CACHE_TTL, show_spinner=False)
+def _cached_list(bucket_name, region, prefix, cred_hash, _s3_connector):
+    """
+    List CSV/JSON/Parquet files, reusing the result for LIST_CACHE_TTL seconds.
+    
+    Streamlit keys the cache on every argument except the underscore-prefixed
+    connector, i.e. on (bucket, region, prefix, credentials hash).
+    
+    Returns:
+        Tuple of (files, message)
+    """
+    list_success, files, list_message = _s3_connector.list_files(
+        bucket_name=bucket_name,
+        file_extensions=['csv', 'json', 'parquet'],
+        prefix=prefix
+    )
+    if not list_success:
+        raise ListingError(list_message)
+    return files, list_message
+
+
+def _needs_conversion(filename, convert_opt):
+    """True if the file will be converted to Parquet (and therefore needs a local copy)."""
+    return convert_opt and get_file_extension(filename) in CONVERTIBLE_EXTENSIONS
+
+
+def _checksum_metadata(hash_algo, digest):
+    """ADLS metadata entry recording a file's checksum, e.g. {'checksum_md5': '...'}."""
+    return {f"checksum_{hash_algo.replace('-', '_')}": digest}
+
+
+def _download_one(item, s3_connector, temp_manager, bucket_name, convert_opt):
+    """
+    Download one S3 object into the temp directory. Returns True on success.
+    
+    Files that won't be converted are not downloaded at all: the upload stage
+    streams them straight from S3 to ADLS instead.
+    """
+    if not _needs_conversion(item['filename'], convert_opt):
+        item['streamed'] = True
+        return True
+    
+    local_temp_path = temp_manager.create_temp_file(item['filename'])
+    
+    download_success, download_msg = s3_connector.download_file(
+        bucket_name=bucket_name,
+        file_key=item['original_key'],
+        local_path=local_temp_path
+    )
+    
+    if not download_success:
+        item['errors'].append(download_msg)
+        return False
+    
+    item['local_path'] = local_temp_path
+    return True
+
+
+def _convert_one(item, temp_manager, convert_opt):
+    """Convert a downloaded CSV/JSON file to Parquet if requested. Always returns True."""
+    filename = item['filename']
+    
+    # Nothing to do for Parquet (or other) sources, even with the option on
+    if not _needs_conversion(filename, convert_opt):
+        return True
+    
+    # Convert to Parquet
+    parquet_filename = filename.rsplit('.', 1)[0] + '.parquet'
+    parquet_path = temp_manager.create_temp_file(parquet_filename)
+    
+    convert_success, convert_msg = convert_to_parquet(item['local_path'], parquet_path)
+    
+    if convert_success:
+        # Remove original file after conversion
+        try:
+            os.remove(item['local_path'])
+        except OSError:
+            pass
+        item['local_path'] = parquet_path
+        item['filename'] = parquet_filename
+        item['converted'] = True
+    else:
+        # Use original file if conversion fails
+        item['errors'].append(f"Conversion failed - {convert_msg}")
+    
+    return True
+
+
+def _upload_one(item, s3_connector, bucket_name, adls_connector, container_name, hash_algo=None):
+    """
+    Upload a file to /raw_data/{filename} in ADLS. Returns True on success.
+    
+    With hash_algo set, files are hashed as their bytes pass through the upload
+    and the checksum is stored with the file as 'checksum_<algo>' metadata once
+    the upload finishes.
+    """
+    # Construct remote path: /raw_data/{filename}
+    remote_path = f"/raw_data/{item['filename']}"
+    
+    if item['streamed']:
+        upload_success, upload_msg = _stream_one(
+            item, s3_connector, bucket_name, adls_connector, container_name, remote_path, hash_algo
+        )
+        if upload_success is None:
+            # Could not open the S3 object; reported as a download error
+            return False
+    elif hash_algo:
+        # One read of the local file both uploads and checksums it
+        upload_success, upload_msg, digest = adls_connector.upload_file_with_hash(
+            container_name=container_name,
+            local_file_path=item['local_path'],
+            remote_path=remote_path,
+            algo=hash_algo
+        )
+        if upload_success:
+            _record_checksum(item, adls_connector, container_name, remote_path, hash_algo, digest)
+    else:
+        upload_success, upload_msg = adls_connector.upload_file(
+            container_name=container_name,
+            local_file_path=item['local_path'],
+            remote_path=remote_path
+        )
+    
+    if upload_success:
+        item['remote_path'] = remote_path
+        item['upload_message'] = upload_msg
+    else:
+        item['upload_error'] = upload_msg
+    return upload_success
+
+
+def _stream_one(item, s3_connector, bucket_name, adls_connector, container_name, remote_path, hash_algo):
+    """
+    Pipe an S3 object body straight into an ADLS upload, hashing it on the way if requested.
+    
+    Returns:
+        Tuple of (upload success, message); success is None if the S3 object could not be opened
+    """
+    open_success, body, size, open_msg = s3_connector.open_stream(bucket_name, item['original_key'])
+    if not open_success:
+        item['errors'].append(open_msg)
+        item['streamed'] = False
+        return None, open_msg
+    
+    try:
+        stream = HashingReader(body, new_hasher(hash_algo)) if hash_algo else body
+        upload_success, upload_msg = adls_connector.upload_stream(
+            container_name=container_name,
+            stream=stream,
+            remote_path=remote_path,
+            length=size
+        )
+    finally:
+        body.close()
+    
+    if upload_success and hash_algo:
+        _record_checksum(item, adls_connector, container_name, remote_path, hash_algo, stream.hexdigest())
+    return upload_success, upload_msg
+
+
+def _record_checksum(item, adls_connector, container_name, remote_path, hash_algo, digest):
+    """Keep an uploaded file's checksum on the item and store it as the file's ADLS metadata."""
+    item['hash'] = digest
+    meta_success, meta_msg = adls_connector.set_file_metadata(
+        container_name, remote_path, _checksum_metadata(hash_algo, digest)
+    )
+    if not meta_success:
+        item['errors'].append(meta_msg)
+
+
+def _run_pipeline(file_keys, stage_fns, on_progress):
+    """
+    Run each file through the download -> convert -> upload stages concurrently.
+    
+    Every stage has its own thread pool, so one file can upload while another is
+    still converting and a third is downloading. Workers report back through a
+    queue and the calling (Streamlit) thread hands each item to the next stage,
+    so only the calling thread ever touches the UI.
+    
+    Args:
+        file_keys: S3 keys to transfer
+        stage_fns: Dict mapping each name in PIPELINE_STAGES to a callable(item) -> bool
+        on_progress: Called with a {stage: completed_count} dict as items advance
+            (throttled to ~100 calls per run, plus a final call)
+    
+    Returns:
+        List of item dicts, in the same order as file_keys
+    """
+    items = [
+        {
+            'original_key': k,
+            'filename': os.path.basename(k),
+            'local_path': None,
+            'converted': False,
+            'streamed': False,
+            'hash': None,
+            'errors': [],
+            'remote_path': None,
+            'upload_message': None,
+            'upload_error': None,
+        }
+        for k in file_keys
+    ]
+    events = queue.Queue()
+    
+    def run_stage(stage, item):
+        try:
+            ok = stage_fns[stage](item)
+        except Exception as e:
+            item['errors'].append(f"Unexpected error - {str(e)}")
+            ok = False
+        events.put((stage, item, ok))
+    
+    completed = {stage: 0 for stage in PIPELINE_STAGES}
+    # Each UI update is a websocket message, so report at most ~100 times per run
+    report_every = max(1, (len(items) * len(PIPELINE_STAGES)) // 100)
+    events_seen = 0
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as download_pool, \
+            ThreadPoolExecutor(max_workers=CONVERT_WORKERS) as convert_pool, \
+            ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as upload_pool:
+        pools = dict(zip(PIPELINE_STAGES, (download_pool, convert_pool, upload_pool)))
+        for item in items:
+            download_pool.submit(run_stage, 'download', item)
+        
+        finished = 0
+        while finished < len(items):
+            stage, item, ok = events.get()
+            stage_idx = PIPELINE_STAGES.index(stage)
+            if ok and stage_idx + 1 < len(PIPELINE_STAGES):
+                completed[stage] += 1
+                next_stage = PIPELINE_STAGES[stage_idx + 1]
+                pools[next_stage].submit(run_stage, next_stage, item)
+            else:
+                # Item is done (uploaded or dropped); count it for any stages it skipped
+                for skipped in PIPELINE_STAGES[stage_idx:]:
+                    completed[skipped] += 1
+                finished += 1
+            events_seen += 1
+            if events_seen % report_every == 0 or finished == len(items):
+                on_progress(completed)
+    
+    return items
+
+
+def _verify_checksums(files, adls_connector, container_name, on_progress, hash_algo='md5'):
+    """
+    Compare each file's local checksum with one computed from its ADLS copy.
+    
+    Local checksums were computed during upload, so only the remote side is
+    hashed here, several files at a time.
+    
+    Args:
+        files: Prepared file dicts (filename, hash; None if the file wasn't uploaded)
+        adls_connector: Connected ADLSConnector
+        container_name: Target container/filesystem
+        on_progress: Called with the fraction (0-1) of checksums computed so far
+            (throttled to ~100 calls, plus a final call)
+        hash_algo: Algorithm the local checksums were computed with
+    
+    Returns:
+        List of result lines, in the same order as files
+    """
+    with ThreadPoolExecutor(max_workers=REMOTE_VERIFY_WORKERS) as remote_pool:
+        remote_futs = [
+            remote_pool.submit(
+                adls_connector.compute_remote_hash,
+                container_name=container_name,
+                remote_path=f"/raw_data/{f['filename']}",
+                algo=hash_algo
+            ) if f['hash'] else None
+            for f in files
+        ]
+        
+        pending = [fut for fut in remote_futs if fut is not None]
+        report_every = max(1, len(pending) // 100)
+        for idx, _ in enumerate(as_completed(pending)):
+            if (idx + 1) % report_every == 0 or idx + 1 == len(pending):
+                on_progress((idx + 1) / len(pending))
+    
+    verify_results = []
+    for file_info, remote_fut in zip(files, remote_futs):
+        if remote_fut is None:
+            verify_results.append(f"{file_info['filename']}: skipped - not uploaded")
+            continue
+        remote_ok, remote_hash = remote_fut.result()
+        if not remote_ok:
+            verify_results.append(f"{file_info['filename']}: remote checksum error - {remote_hash}")
+        elif file_info['hash'] == remote_hash:
+            verify_results.append(f"✅ {file_info['filename']}: checksum OK")
+        else:
+            verify_results.append(f"❌ {file_info['filename']}: checksum MISMATCH")
+    return verify_results
+
 
 # Set page configuration
 st.set_page_config(
@@ -78,6 +486,11 @@ s3_bucket_name = st.sidebar.text_input(
     help="Enter the name of your S3 bucket",
     key="s3_bucket_name"
 )
+s3_prefix = st.sidebar.text_input(
+    "S3 Prefix (optional)",
+    help="Only list keys under this prefix (e.g., exports/2024/)",
+    key="s3_prefix"
+)
 
 # Sidebar for Azure configuration
 st.sidebar.header("🔐 Azure Configuration")
@@ -100,7 +513,7 @@ azure_container_name = st.sidebar.text_input(
 
 # Initialize session state for storing file list
 if 's3_files' not in st.session_state:
-    st.session_state.s3_files = []
+    st.session_state.s3_files = None  # DataFrame from S3Connector.list_files
 if 'file_list_message' not in st.session_state:
     st.session_state.file_list_message = ""
 if 's3_connector' not in st.session_state:
@@ -112,7 +525,7 @@ if 'temp_file_manager' not in st.session_state:
 st.header("✨ File Transfer")
 
 # Button to list files
-col1, col2 = st.columns(2)
+col1, col_refresh, col2 = st.columns([2, 1, 2])
 
 with col1:
     list_files_btn = st.button(
@@ -122,6 +535,17 @@ with col1:
         help="Fetch and display files from S3 bucket"
     )
 
+with col_refresh:
+    refresh_btn = st.button(
+        "🔄 Refresh",
+        use_container_width=True,
+        help=f"List files again, ignoring listings cached in the last {LIST_CACHE_TTL}s"
+    )
+
+if refresh_btn:
+    _cached_list.clear()
+    list_files_btn = True
+
 # Handle List Files button click
 if list_files_btn:
     # Validate inputs
@@ -130,70 +554,70 @@ if list_files_btn:
     else:
         with st.spinner("Connecting to AWS S3 and listing files..."):
             try:
-                # Create S3 connector
-                s3_connector = S3Connector(
-                    access_key_id=aws_access_key_id,
-                    secret_access_key=aws_secret_access_key,
-                    region=aws_region
+                # Connect (reuses the cached connector if these credentials were seen before)
+                success, s3_connector, message = _get_s3_connector(
+                    aws_access_key_id, aws_secret_access_key, aws_region
                 )
-                
-                # Connect
-                success, message = s3_connector.connect()
+                st.session_state.s3_connector = s3_connector
                 if not success:
                     st.error(f"❌ Connection failed: {message}")
-                    st.session_state.s3_files = []
+                    st.session_state.s3_files = None
                 else:
                     # Test bucket access
                     test_success, test_message = s3_connector.test_connection(s3_bucket_name)
                     if not test_success:
                         st.error(f"❌ {test_message}")
-                        st.session_state.s3_files = []
+                        st.session_state.s3_files = None
                     else:
                         st.success(f"✅ {test_message}")
                         
-                        # List files (CSV, JSON, Parquet)
-                        list_success, files, list_message = s3_connector.list_files(
-                            bucket_name=s3_bucket_name,
-                            file_extensions=['csv', 'json', 'parquet']
-                        )
+                        # List files (CSV, JSON, Parquet), reusing a recent listing if there is one
+                        try:
+                            files, list_message = _cached_list(
+                                s3_bucket_name,
+                                aws_region,
+                                s3_prefix or None,
+                                _credentials_hash(aws_access_key_id, aws_secret_access_key),
+                                s3_connector
+                            )
+                            list_success = True
+                        except ListingError as e:
+                            list_success, files, list_message = False, None, str(e)
                         
                         if list_success:
                             st.session_state.s3_files = files
                             st.session_state.file_list_message = list_message
-                            st.session_state.s3_connector = s3_connector  # Store connector for later use
-                            if files:
+                            if not files.empty:
                                 st.success(f"✅ {list_message}")
                             else:
                                 st.warning(f"⚠️ {list_message}")
                         else:
                             st.error(f"❌ {list_message}")
-                            st.session_state.s3_files = []
+                            st.session_state.s3_files = None
                             
             except Exception as e:
                 st.error(f"❌ Unexpected error: {str(e)}")
-                st.session_state.s3_files = []
+                st.session_state.s3_files = None
 
 # Display file list if available
-if st.session_state.s3_files:
+files_df = st.session_state.s3_files
+if files_df is not None and not files_df.empty:
     st.subheader("📁 Available Files in S3 Bucket")
     
     # Summary metrics
-    total_files = len(st.session_state.s3_files)
-    total_size_mb = round(sum(f['size_mb'] for f in st.session_state.s3_files), 2)
+    total_files = len(files_df)
+    total_size_mb = round(files_df['size'].sum() / (1024 * 1024), 2)
     c1, c2 = st.columns(2)
     c1.metric("Files", f"{total_files}")
     c2.metric("Total Size", f"{total_size_mb} MB")
 
     # Create a table to display files with sizes
-    file_data = {
-        "File Name": [f['name'] for f in st.session_state.s3_files],
-        "Size (MB)": [f['size_mb'] for f in st.session_state.s3_files]
-    }
-    st.dataframe(file_data, use_container_width=True, height=260)
+    file_data = files_df[['name', 'size_mb']].rename(columns={'name': "File Name", 'size_mb': "Size (MB)"})
+    st.dataframe(file_data, use_container_width=True, height=260, hide_index=True)
     
     # File selection area
     st.subheader("Selected Files")
-    file_options = [f['name'] for f in st.session_state.s3_files]
+    file_options = files_df['name'].tolist()
     selected_files = st.multiselect(
         "Select files to transfer",
         options=file_options,
@@ -212,7 +636,7 @@ else:
 
 # Optional: Transfer options
 st.subheader("⚙️ Transfer Options")
-cols_opts = st.columns(2)
+cols_opts = st.columns(3)
 with cols_opts[0]:
     convert_to_parquet_opt = st.checkbox(
         "Convert CSV/JSON to Parquet",
@@ -222,11 +646,22 @@ with cols_opts[0]:
     )
 with cols_opts[1]:
     verify_checksum_opt = st.checkbox(
-        "Verify checksum (MD5)",
+        "Verify checksum",
         value=False,
-        help="After upload, compute and compare MD5 to ensure integrity",
+        help="After upload, compute and compare checksums to ensure integrity",
         key="verify_checksum_opt"
     )
+with cols_opts[2]:
+    hash_algos = available_hash_algorithms()
+    hash_algo_opt = st.selectbox(
+        "Checksum algorithm",
+        options=hash_algos,
+        index=hash_algos.index(DEFAULT_HASH_ALGO) if DEFAULT_HASH_ALGO in hash_algos else 0,
+        format_func=HASH_LABELS.get,
+        help="BLAKE2b/BLAKE3 hash much faster than MD5",
+        key="hash_algo_opt",
+        disabled=not verify_checksum_opt
+    )
 
 # Button to upload
 with col2:
@@ -253,218 +688,147 @@ if upload_btn:
         temp_manager = st.session_state.temp_file_manager
         s3_connector = st.session_state.s3_connector
         
-        downloaded_files = []
-        converted_files = []
-        errors = []
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        total_files = len(selected_files)
+        # Connect to Azure up front so uploads can start as soon as the first file is ready
+        connect_success, adls_connector, connect_msg = _get_adls_connector(
+            azure_storage_account_name, azure_account_key
+        )
+        test_success, test_msg = False, ""
+        if not connect_success:
+            st.error(f"❌ Azure connection failed: {connect_msg}")
+        else:
+            # Test container access
+            test_success, test_msg = adls_connector.test_connection(azure_container_name)
+            if not test_success:
+                st.error(f"❌ {test_msg}")
+            else:
+                st.success(f"✅ {test_msg}")
         
-        for idx, file_key in enumerate(selected_files):
-            status_text.text(f"Processing {idx + 1}/{total_files}: {file_key}")
+        if connect_success and test_success:
+            # Create raw_data directory if needed
+            dir_success, dir_msg = adls_connector.create_directory_if_not_exists(
+                container_name=azure_container_name,
+                directory_path="raw_data"
+            )
             
-            try:
-                # Step 1: Download file from S3
-                filename = os.path.basename(file_key)
-                local_temp_path = temp_manager.create_temp_file(filename)
-                
-                download_success, download_msg = s3_connector.download_file(
-                    bucket_name=s3_bucket_name,
-                    file_key=file_key,
-                    local_path=local_temp_path
-                )
-                
-                if not download_success:
-                    errors.append(f"{file_key}: {download_msg}")
-                    continue
-                
-                # Step 2: Convert to Parquet if needed
-                file_ext = get_file_extension(filename)
-                final_path = local_temp_path
-                final_filename = filename
-                
-                if convert_to_parquet_opt and file_ext in ['csv', 'json']:
-                    # Convert to Parquet
-                    parquet_filename = filename.rsplit('.', 1)[0] + '.parquet'
-                    parquet_path = temp_manager.create_temp_file(parquet_filename)
-                    
-                    convert_success, convert_msg = convert_to_parquet(local_temp_path, parquet_path)
-                    
-                    if convert_success:
-                        final_path = parquet_path
-                        final_filename = parquet_filename
-                        converted_files.append({
-                            'original': filename,
-                            'converted': parquet_filename
-                        })
-                        # Remove original file after conversion
-                        try:
-                            os.remove(local_temp_path)
-                        except:
-                            pass
-                    else:
-                        errors.append(f"{file_key}: Conversion failed - {convert_msg}")
-                        # Use original file if conversion fails
-                        final_path = local_temp_path
-                        final_filename = filename
-                
-                # Store file info with final path (after conversion if applicable)
-                downloaded_files.append({
-                    'original_key': file_key,
-                    'local_path': final_path,
-                    'filename': final_filename
-                })
-                
-                # Update progress
-                progress = (idx + 1) / total_files
-                progress_bar.progress(progress)
-                
-            except Exception as e:
-                errors.append(f"{file_key}: Unexpected error - {str(e)}")
-        
-        # Store prepared files in session state for upload step
-        st.session_state.prepared_files = downloaded_files
-        
-        # Display results
-        status_text.empty()
-        progress_bar.empty()
-        
-        if downloaded_files:
-            st.success(f"✅ Successfully prepared {len(downloaded_files)} file(s) for upload!")
+            st.subheader("📤 Transferring S3 → Azure ADLS Gen2...")
+            total_files = len(selected_files)
+            stage_labels = {'download': "Downloading", 'convert': "Preparing", 'upload': "Uploading"}
+            stage_bars = {stage: st.progress(0, text=f"{stage_labels[stage]} 0/{total_files}")
+                          for stage in PIPELINE_STAGES}
+            
+            def _update_progress(completed):
+                for stage, count in completed.items():
+                    stage_bars[stage].progress(
+                        count / total_files,
+                        text=f"{stage_labels[stage]} {count}/{total_files}"
+                    )
+            
+            items = _run_pipeline(
+                selected_files,
+                stage_fns={
+                    'download': lambda item: _download_one(
+                        item, s3_connector, temp_manager, s3_bucket_name, convert_to_parquet_opt
+                    ),
+                    'convert': lambda item: _convert_one(item, temp_manager, convert_to_parquet_opt),
+                    'upload': lambda item: _upload_one(
+                        item, s3_connector, s3_bucket_name, adls_connector, azure_container_name,
+                        hash_algo_opt if verify_checksum_opt else None
+                    ),
+                },
+                on_progress=_update_progress
+            )
             
-            if converted_files:
-                st.info(f"📦 Converted {len(converted_files)} file(s) to Parquet format")
+            for bar in stage_bars.values():
+                bar.empty()
             
-            # Store conversion info
+            # Split results back into the prepared/converted/uploaded views used below
+            downloaded_files = [
+                {
+                    'original_key': it['original_key'],
+                    'local_path': it['local_path'],
+                    'filename': it['filename'],
+                    'hash': it['hash']
+                }
+                for it in items if it['local_path'] or it['streamed']
+            ]
+            converted_files = [
+                {'original': os.path.basename(it['original_key']), 'converted': it['filename']}
+                for it in items if it['converted']
+            ]
+            errors = [f"{it['original_key']}: {err}" for it in items for err in it['errors']]
+            uploaded_files = [
+                {'filename': it['filename'], 'remote_path': it['remote_path'], 'message': it['upload_message']}
+                for it in items if it['remote_path']
+            ]
+            upload_errors = [f"{it['filename']}: {it['upload_error']}" for it in items if it['upload_error']]
+            
+            # Store prepared files and conversion info in session state
+            st.session_state.prepared_files = downloaded_files
             st.session_state.converted_files = converted_files
             st.session_state.convert_to_parquet_option = convert_to_parquet_opt
             
-            # Now upload to Azure ADLS
-            st.subheader("📤 Uploading to Azure ADLS Gen2...")
-            
-            # Initialize Azure connector
-            adls_connector = ADLSConnector(
-                account_name=azure_storage_account_name,
-                account_key=azure_account_key
-            )
+            if downloaded_files:
+                st.success(f"✅ Successfully prepared {len(downloaded_files)} file(s) for upload!")
+                
+                if converted_files:
+                    st.info(f"📦 Converted {len(converted_files)} file(s) to Parquet format")
             
-            # Connect to Azure
-            connect_success, connect_msg = adls_connector.connect()
-            if not connect_success:
-                st.error(f"❌ Azure connection failed: {connect_msg}")
-            else:
-                # Test container access
-                test_success, test_msg = adls_connector.test_connection(azure_container_name)
-                if not test_success:
-                    st.error(f"❌ {test_msg}")
-                else:
-                    st.success(f"✅ {test_msg}")
-                    
-                    # Create raw_data directory if needed
-                    dir_success, dir_msg = adls_connector.create_directory_if_not_exists(
-                        container_name=azure_container_name,
-                        directory_path="raw_data"
-                    )
-                    
-                    # Upload files
-                    upload_progress = st.progress(0)
-                    upload_status = st.empty()
-                    
-                    uploaded_files = []
-                    upload_errors = []
+            # Display upload results
+            if uploaded_files:
+                st.success(f"✅ Successfully uploaded {len(uploaded_files)} file(s) to Azure ADLS!")
+                
+                # Render one table rather than one element per file
+                uploaded_rows = []
+                for file_info in uploaded_files:
+                    # Extract size info from message if available
+                    size_info = ""
+                    if '(' in file_info['message']:
+                        size_info = file_info['message'].split('(')[1].rstrip(')')
+                    uploaded_rows.append({
+                        "File Name": file_info['filename'],
+                        "ADLS Path": file_info['remote_path'],
+                        "Size": size_info
+                    })
+                with st.expander("📋 Uploaded Files", expanded=True):
+                    st.dataframe(uploaded_rows, use_container_width=True, hide_index=True)
+
+                # Optional checksum verification
+                if verify_checksum_opt:
+                    st.subheader(f"🔎 Verifying checksums ({HASH_LABELS[hash_algo_opt]})")
+                    verify_progress = st.progress(0)
+                    verify_results = []
                     
-                    for idx, file_info in enumerate(downloaded_files):
-                        upload_status.text(f"Uploading {idx + 1}/{len(downloaded_files)}: {file_info['filename']}")
-                        
-                        # Construct remote path: /raw_data/{filename}
-                        remote_path = f"/raw_data/{file_info['filename']}"
-                        
-                        upload_success, upload_msg = adls_connector.upload_file(
-                            container_name=azure_container_name,
-                            local_file_path=file_info['local_path'],
-                            remote_path=remote_path
+                    # Check if method exists (for backwards compatibility)
+                    if not hasattr(adls_connector, 'compute_remote_hash'):
+                        verify_results.append("⚠️ Checksum verification not available (method not found)")
+                    else:
+                        verify_results = _verify_checksums(
+                            downloaded_files,
+                            adls_connector,
+                            azure_container_name,
+                            on_progress=verify_progress.progress,
+                            hash_algo=hash_algo_opt
                         )
-                        
-                        if upload_success:
-                            uploaded_files.append({
-                                'filename': file_info['filename'],
-                                'remote_path': remote_path,
-                                'message': upload_msg
-                            })
-                        else:
-                            upload_errors.append(f"{file_info['filename']}: {upload_msg}")
-                        
-                        # Update progress
-                        upload_progress.progress((idx + 1) / len(downloaded_files))
-                    
-                    upload_progress.empty()
-                    upload_status.empty()
-                    
-                    # Display upload results
-                    if uploaded_files:
-                        st.success(f"✅ Successfully uploaded {len(uploaded_files)} file(s) to Azure ADLS!")
-                        
-                        with st.expander("📋 Uploaded Files", expanded=True):
-                            for file_info in uploaded_files:
-                                # Extract size info from message if available
-                                size_info = ""
-                                if '(' in file_info['message']:
-                                    size_info = file_info['message'].split('(')[1].rstrip(')')
-                                line = f"✅ **{file_info['filename']}** → `{file_info['remote_path']}` {size_info}"
-                                st.write(line)
-
-                        # Optional checksum verification
-                        if verify_checksum_opt:
-                            st.subheader("🔎 Verifying checksums (MD5)")
-                            verify_progress = st.progress(0)
-                            verify_results = []
-                            
-                            # Check if method exists (for backwards compatibility)
-                            if not hasattr(adls_connector, 'compute_remote_md5'):
-                                verify_results.append("⚠️ Checksum verification not available (method not found)")
-                            else:
-                                for idx, file_info in enumerate(downloaded_files):
-                                    local_ok, local_md5 = md5_file(file_info['local_path'])
-                                    if not local_ok:
-                                        verify_results.append(f"{file_info['filename']}: local MD5 error - {local_md5}")
-                                        continue
-                                    remote_ok, remote_md5 = adls_connector.compute_remote_md5(
-                                        container_name=azure_container_name,
-                                        remote_path=f"/raw_data/{file_info['filename']}"
-                                    )
-                                    if not remote_ok:
-                                        verify_results.append(f"{file_info['filename']}: remote MD5 error - {remote_md5}")
-                                    else:
-                                        if local_md5 == remote_md5:
-                                            verify_results.append(f"✅ {file_info['filename']}: checksum OK")
-                                        else:
-                                            verify_results.append(f"❌ {file_info['filename']}: checksum MISMATCH")
-                                    verify_progress.progress((idx + 1) / len(downloaded_files))
-                            
-                            verify_progress.empty()
-                            for line in verify_results:
-                                st.write(line)
-                        
-                        # Cleanup temporary files and reset manager
-                        try:
-                            if st.session_state.temp_file_manager:
-                                st.session_state.temp_file_manager.cleanup()
-                                st.session_state.temp_file_manager = None
-                                st.info("🧹 Temporary files cleaned up successfully!")
-                        except Exception as e:
-                            st.warning(f"⚠️ Could not cleanup temp files: {str(e)}")
                     
-                    if upload_errors:
-                        st.error(f"❌ Upload errors for {len(upload_errors)} file(s):")
-                        for error in upload_errors:
-                            st.write(f"  - {error}")
-        
-        if errors:
-            st.error(f"❌ Errors occurred with {len(errors)} file(s):")
-            for error in errors:
-                st.write(f"  - {error}")
+                    verify_progress.empty()
+                    st.markdown("  \n".join(verify_results))
+                
+                # Cleanup temporary files and reset manager
+                try:
+                    if st.session_state.temp_file_manager:
+                        st.session_state.temp_file_manager.cleanup()
+                        st.session_state.temp_file_manager = None
+                        st.info("🧹 Temporary files cleaned up successfully!")
+                except Exception as e:
+                    st.warning(f"⚠️ Could not cleanup temp files: {str(e)}")
+            
+            if upload_errors:
+                st.error(f"❌ Upload errors for {len(upload_errors)} file(s):")
+                st.markdown("\n".join(f"- {error}" for error in upload_errors))
+            
+            if errors:
+                st.error(f"❌ Errors occurred with {len(errors)} file(s):")
+                st.markdown("\n".join(f"- {error}" for error in errors))
 
 # Status/info section
 st.header("Status")
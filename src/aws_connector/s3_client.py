@@ -4,14 +4,38 @@ Handles connection to S3 and file listing operations.
 """
 
 import boto3
+import numpy as np
+import pandas as pd
+import threading
+import time
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
+from botocore.response import StreamingBody
 from typing import List, Dict, Optional, Tuple
 
 
+def _key_suffixes(file_extensions: List[str]) -> Tuple[str, ...]:
+    """Lower-case '.ext' suffixes for str.endswith, e.g. ['CSV', '.json'] -> ('.csv', '.json')."""
+    return tuple(dict.fromkeys('.' + ext.lower().lstrip('.') for ext in file_extensions))
+
+
+def _files_frame(keys: List[str], sizes: np.ndarray) -> pd.DataFrame:
+    """Build the listing DataFrame (name, size, size_mb) with sizes converted to MB in one vector op."""
+    df = pd.DataFrame({'name': pd.Series(keys, dtype=object), 'size': sizes})
+    df['size_mb'] = np.round(sizes / (1 << 20), 2)  # Convert to MB
+    return df
+
+
 class S3Connector:
     """Simple class to handle AWS S3 operations."""
     
-    def __init__(self, access_key_id: str, secret_access_key: str, region: str):
+    def __init__(self, access_key_id: str, secret_access_key: str, region: str,
+                 multipart_threshold: int = 16 * 1024 * 1024,
+                 multipart_chunksize: int = 16 * 1024 * 1024,
+                 max_concurrency: int = 16,
+                 bucket_check_ttl: float = 30.0,
+                 max_pool_connections: int = 64):
         """
         Initialize S3 client with credentials.
         
@@ -19,11 +43,27 @@ class S3Connector:
             access_key_id: AWS Access Key ID
             secret_access_key: AWS Secret Access Key
             region: AWS region (e.g., 'us-east-1')
+            multipart_threshold: Object size (bytes) above which downloads use ranged GETs
+            multipart_chunksize: Size (bytes) of each ranged GET part
+            max_concurrency: Number of threads fetching parts of a single object
+            bucket_check_ttl: Seconds a successful test_connection() is reused before HeadBucket is sent again
+            max_pool_connections: Size of the client's HTTP connection pool, shared by all threads
         """
         self.access_key_id = access_key_id
         self.secret_access_key = secret_access_key
         self.region = region
+        self.multipart_threshold = multipart_threshold
+        self.multipart_chunksize = multipart_chunksize
+        self.max_concurrency = max_concurrency
+        self.bucket_check_ttl = bucket_check_ttl
+        self.max_pool_connections = max_pool_connections
         self.s3_client = None
+        self._paginator = None
+        self._tc = None
+        # bucket name -> time.monotonic() of the last successful HeadBucket
+        self._tested_buckets: Dict[str, float] = {}
+        # The connector is shared by all Streamlit sessions and worker threads
+        self._tested_lock = threading.Lock()
     
     def connect(self) -> Tuple[bool, str]:
         """
@@ -33,17 +73,37 @@ class S3Connector:
             Tuple of (success: bool, message: str)
         """
         try:
+            # One client is shared by parallel downloads, each with its own ranged-GET threads;
+            # the default pool of 10 connections would make them queue for sockets
+            client_config = Config(
+                max_pool_connections=self.max_pool_connections,
+                retries={'max_attempts': 10, 'mode': 'adaptive'},
+                tcp_keepalive=True
+            )
             self.s3_client = boto3.client(
                 's3',
                 aws_access_key_id=self.access_key_id,
                 aws_secret_access_key=self.secret_access_key,
-                region_name=self.region
+                region_name=self.region,
+                config=client_config
+            )
+            with self._tested_lock:
+                self._tested_buckets.clear()
+            # list_objects_v2 returns at most 1000 keys per call, so walk every page
+            self._paginator = self.s3_client.get_paginator('list_objects_v2')
+            # Larger parts and more threads than the boto3 defaults (8 MB, 10) for big objects
+            self._tc = TransferConfig(
+                multipart_threshold=self.multipart_threshold,
+                multipart_chunksize=self.multipart_chunksize,
+                max_concurrency=self.max_concurrency,
+                use_threads=True
             )
             return True, "Connected successfully"
         except Exception as e:
             return False, f"Connection error: {str(e)}"
     
-    def list_files(self, bucket_name: str, file_extensions: Optional[List[str]] = None) -> Tuple[bool, List[Dict], str]:
+    def list_files(self, bucket_name: str, file_extensions: Optional[List[str]] = None,
+                   prefix: Optional[str] = None) -> Tuple[bool, pd.DataFrame, str]:
         """
         List files in S3 bucket.
         
@@ -51,57 +111,77 @@ class S3Connector:
             bucket_name: Name of S3 bucket
             file_extensions: Optional list of file extensions to filter (e.g., ['csv', 'json', 'parquet'])
                            If None, returns all files
+            prefix: Optional key prefix (e.g., 'exports/2024/') to narrow the listing server-side
         
         Returns:
-            Tuple of (success: bool, files: List[Dict], message: str)
-            Each file dict contains: {'name': str, 'size': int, 'size_mb': float}
+            Tuple of (success: bool, files: pd.DataFrame, message: str)
+            files has one row per file, sorted by name, with columns
+            'name' (str), 'size' (int64 bytes) and 'size_mb' (float)
         """
+        empty = _files_frame([], np.empty(0, dtype=np.int64))
         if self.s3_client is None:
-            return False, [], "Not connected. Call connect() first."
+            return False, empty, "Not connected. Call connect() first."
         
         if file_extensions is None:
             # Default: CSV, JSON, Parquet
             file_extensions = ['csv', 'json', 'parquet']
         
         try:
-            # List objects in bucket
-            response = self.s3_client.list_objects_v2(Bucket=bucket_name)
+            # List objects in bucket (all pages, not just the first 1000 keys)
+            paginate_kwargs = {'Bucket': bucket_name, 'PaginationConfig': {'PageSize': 1000}}
+            if prefix:
+                paginate_kwargs['Prefix'] = prefix
+            pages = self._paginator.paginate(**paginate_kwargs)
+            
+            # Case-insensitive extension filter (data.CSV and data.Csv match 'csv'); one
+            # endswith() call checks every suffix. No extensions means nothing can match.
+            suffixes = _key_suffixes(file_extensions)
+            
+            # Accumulate raw columns (keys, byte sizes) instead of a dict per object;
+            # sizes become one int64 array, and MB, only once at the end
+            keys = []
+            sizes = []
+            page_count = 0
+            object_count = 0
+            for page in pages:
+                page_count += 1
+                object_count += page.get('KeyCount', 0)
+                if not suffixes:
+                    continue
+                for obj in page.get('Contents', ()):
+                    key = obj['Key']
+                    if key.lower().endswith(suffixes):
+                        keys.append(key)
+                        sizes.append(obj['Size'])
             
-            if 'Contents' not in response:
-                return True, [], "Bucket is empty or no files found."
+            if object_count == 0:
+                return True, empty, "Bucket is empty or no files found."
             
-            files = []
-            for obj in response['Contents']:
-                file_key = obj['Key']  # File path/name in bucket
-                file_size = obj['Size']  # Size in bytes
-                
-                # Filter by extension (case-insensitive)
-                file_ext = file_key.split('.')[-1].lower() if '.' in file_key else ''
-                if file_ext in [ext.lower() for ext in file_extensions]:
-                    files.append({
-                        'name': file_key,
-                        'size': file_size,
-                        'size_mb': round(file_size / (1024 * 1024), 2)  # Convert to MB
-                    })
+            files = _files_frame(keys, np.fromiter(sizes, dtype=np.int64, count=len(sizes)))
             
-            # Sort by filename
-            files.sort(key=lambda x: x['name'])
+            # Sort by filename. ListObjectsV2 already returns keys in UTF-8 binary order across
+            # pages (the same order as str comparison), so this is normally an O(N) check only
+            if not files['name'].is_monotonic_increasing:
+                files = files.sort_values('name', ignore_index=True)
             
-            message = f"Found {len(files)} file(s) matching extensions: {', '.join(file_extensions)}"
+            message = (
+                f"Found {len(files)} file(s) matching extensions: {', '.join(file_extensions)} "
+                f"({page_count} page(s) scanned)"
+            )
             return True, files, message
             
         except ClientError as e:
             error_code = e.response['Error']['Code']
             if error_code == 'NoSuchBucket':
-                return False, [], f"Bucket '{bucket_name}' does not exist."
+                return False, empty, f"Bucket '{bucket_name}' does not exist."
             elif error_code == 'AccessDenied':
-                return False, [], "Access denied. Check your AWS credentials and permissions."
+                return False, empty, "Access denied. Check your AWS credentials and permissions."
             else:
-                return False, [], f"AWS error: {error_code} - {str(e)}"
+                return False, empty, f"AWS error: {error_code} - {str(e)}"
         except NoCredentialsError:
-            return False, [], "AWS credentials not found or invalid."
+            return False, empty, "AWS credentials not found or invalid."
         except Exception as e:
-            return False, [], f"Error listing files: {str(e)}"
+            return False, empty, f"Error listing files: {str(e)}"
     
     def test_connection(self, bucket_name: str) -> Tuple[bool, str]:
         """
@@ -116,8 +196,16 @@ class S3Connector:
         if self.s3_client is None:
             return False, "Not connected. Call connect() first."
         
+        # Bucket access rarely changes, so skip the round-trip if it was checked recently
+        with self._tested_lock:
+            checked_at = self._tested_buckets.get(bucket_name)
+        if checked_at is not None and time.monotonic() - checked_at < self.bucket_check_ttl:
+            return True, f"Successfully connected to bucket '{bucket_name}'"
+        
         try:
             self.s3_client.head_bucket(Bucket=bucket_name)
+            with self._tested_lock:
+                self._tested_buckets[bucket_name] = time.monotonic()
             return True, f"Successfully connected to bucket '{bucket_name}'"
         except ClientError as e:
             error_code = e.response['Error']['Code']
@@ -146,8 +234,8 @@ class S3Connector:
             return False, "Not connected. Call connect() first."
         
         try:
-            # Download file from S3
-            self.s3_client.download_file(bucket_name, file_key, local_path)
+            # Download file from S3 (multipart ranged GETs for large objects)
+            self.s3_client.download_file(bucket_name, file_key, local_path, Config=self._tc)
             return True, f"Successfully downloaded {file_key}"
         except ClientError as e:
             error_code = e.response['Error']['Code']
@@ -159,4 +247,33 @@ class S3Connector:
                 return False, f"AWS error: {error_code} - {str(e)}"
         except Exception as e:
             return False, f"Error downloading file: {str(e)}"
-
+    
+    def open_stream(self, bucket_name: str, file_key: str) -> Tuple[bool, Optional[StreamingBody], int, str]:
+        """
+        Open an S3 object for sequential reading, so it can be piped elsewhere without a temp file.
+        
+        The caller must close() the returned stream.
+        
+        Args:
+            bucket_name: Name of S3 bucket
+            file_key: Key (path) of file in S3 bucket
+        
+        Returns:
+            Tuple of (success: bool, stream or None, size in bytes: int, message: str)
+        """
+        if self.s3_client is None:
+            return False, None, 0, "Not connected. Call connect() first."
+        
+        try:
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=file_key)
+            return True, response['Body'], response['ContentLength'], f"Opened {file_key}"
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == 'NoSuchKey':
+                return False, None, 0, f"File '{file_key}' not found in bucket."
+            elif error_code == 'AccessDenied':
+                return False, None, 0, "Access denied. Check your AWS credentials and permissions."
+            else:
+                return False, None, 0, f"AWS error: {error_code} - {str(e)}"
+        except Exception as e:
+            return False, None, 0, f"Error opening file: {str(e)}"
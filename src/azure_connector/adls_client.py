@@ -5,25 +5,52 @@ Handles connection to Azure ADLS Gen2 and file upload operations.
 
 from azure.storage.filedatalake import DataLakeServiceClient
 from azure.core.exceptions import AzureError, ResourceExistsError
-from typing import Tuple
+from azure.core.pipeline.transport import RequestsTransport
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from requests.adapters import HTTPAdapter
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set, Tuple
 import os
-import hashlib
+import requests
+import threading
+
+from utils.checksum import HashingReader, new_hasher
+
+# Per-host connection pools kept by the shared requests session (urllib3's pool_connections).
+# The SDK reaches both <account>.dfs. and, through its internal blob clients, <account>.blob.;
+# this leaves room for both plus any redirects, so no host's warm pool is evicted.
+HTTP_HOST_POOLS = 32
 
 
 class ADLSConnector:
     """Simple class to handle Azure ADLS Gen2 operations."""
     
-    def __init__(self, account_name: str, account_key: str):
+    def __init__(self, account_name: str, account_key: str, max_concurrency: int = 8,
+                 upload_chunk_size: int = 4 * 1024 * 1024, max_pool_connections: int = 64):
         """
         Initialize ADLS client with credentials.
         
         Args:
             account_name: Azure Storage Account name
             account_key: Azure Storage Account Key
+            max_concurrency: Parallel block PUTs (uploads) / ranged GETs (downloads) per file
+            upload_chunk_size: Size (bytes) of each uploaded block
+            max_pool_connections: Size of the HTTP connection pool, shared by all threads
         """
         self.account_name = account_name
         self.account_key = account_key
+        self.max_concurrency = max_concurrency
+        self.upload_chunk_size = upload_chunk_size
+        self.max_pool_connections = max_pool_connections
         self.service_client = None
+        # container name -> FileSystemClient, so each operation doesn't build a new one. The
+        # connector is shared by all Streamlit sessions and worker threads, hence the lock.
+        self._file_system_clients = {}
+        self._file_system_lock = threading.Lock()
+        # (container, directory) pairs known to exist, so uploads skip create_directory round-trips
+        self._ensured_dirs: Set[Tuple[str, str]] = set()
+        self._ensured_lock = threading.Lock()
     
     def connect(self) -> Tuple[bool, str]:
         """
@@ -35,10 +62,20 @@ class ADLSConnector:
         try:
             account_url = f"https://{self.account_name}.dfs.core.windows.net"
             
+            # Parallel block uploads and ranged GETs from many threads share one session;
+            # requests' default pool of 10 would make them queue for (and re-handshake) sockets
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_HOST_POOLS, pool_maxsize=self.max_pool_connections)
+            session.mount('https://', adapter)
+            
             self.service_client = DataLakeServiceClient(
                 account_url=account_url,
-                credential=self.account_key
+                credential=self.account_key,
+                transport=RequestsTransport(session=session)
             )
+            with self._file_system_lock:
+                self._file_system_clients.clear()
+            self._ensured_dirs.clear()
             return True, "Connected successfully"
         except Exception as e:
             return False, f"Connection error: {str(e)}"
@@ -57,7 +94,7 @@ class ADLSConnector:
             return False, "Not connected. Call connect() first."
         
         try:
-            file_system_client = self.service_client.get_file_system_client(file_system=container_name)
+            file_system_client = self._get_file_system_client(container_name)
             # Try to get properties (will raise error if container doesn't exist or no access)
             properties = file_system_client.get_file_system_properties()
             return True, f"Successfully connected to container '{container_name}'"
@@ -71,7 +108,9 @@ class ADLSConnector:
         except Exception as e:
             return False, f"Connection test failed: {str(e)}"
     
-    def upload_file(self, container_name: str, local_file_path: str, remote_path: str) -> Tuple[bool, str]:
+    def upload_file(self, container_name: str, local_file_path: str, remote_path: str,
+                    metadata: Optional[Dict[str, str]] = None, max_concurrency: Optional[int] = None,
+                    chunk_size: Optional[int] = None) -> Tuple[bool, str]:
         """
         Upload a file to ADLS Gen2.
         
@@ -79,6 +118,9 @@ class ADLSConnector:
             container_name: Name of the container/filesystem
             local_file_path: Path to local file to upload
             remote_path: Path in ADLS (e.g., '/raw_data/filename.parquet')
+            metadata: Optional custom metadata stored with the file (e.g., {'checksum_blake3': '...'})
+            max_concurrency: Parallel block uploads for this file (defaults to self.max_concurrency)
+            chunk_size: Size in bytes of each uploaded block (defaults to self.upload_chunk_size)
         
         Returns:
             Tuple of (success: bool, message: str)
@@ -86,79 +128,320 @@ class ADLSConnector:
         if self.service_client is None:
             return False, "Not connected. Call connect() first."
         
-        # Check if local file exists
-        if not os.path.exists(local_file_path):
-            return False, f"Local file not found: {local_file_path}"
+        directory_path = os.path.dirname(remote_path).lstrip('/')
+        return self._upload_path(
+            container_name, local_file_path, remote_path,
+            lambda: self._get_parent_client(container_name, directory_path),
+            metadata, max_concurrency, chunk_size
+        )
+
+    def _upload_path(self, container_name: str, local_file_path: str, remote_path: str,
+                     resolve_parent: Callable[[], Any], metadata: Optional[Dict[str, str]] = None,
+                     max_concurrency: Optional[int] = None, chunk_size: Optional[int] = None) -> Tuple[bool, str]:
+        """
+        Open a local file, then resolve its parent directory and upload it via _upload_to.
         
+        The file is opened before resolve_parent is called, so a missing local file
+        fails without sending a create_directory request.
+        """
         try:
-            # Get file system (container) client
-            file_system_client = self.service_client.get_file_system_client(file_system=container_name)
-            
-            # Ensure the directory path exists (create if needed)
-            # Remove filename from path to get directory
-            directory_path = os.path.dirname(remote_path).lstrip('/')
-            if directory_path:
-                directory_client = file_system_client.get_directory_client(directory_path)
-                try:
-                    directory_client.create_directory()
-                except ResourceExistsError:
-                    # Directory already exists, that's fine
-                    pass
-            
-            # Get file client for the target file
-            file_client = file_system_client.get_file_client(remote_path)
-            
-            # Upload file
-            file_size = os.path.getsize(local_file_path)
             with open(local_file_path, 'rb') as local_file:
-                file_client.upload_data(
-                    data=local_file.read(),
-                    overwrite=True
-                )
+                file_size = os.fstat(local_file.fileno()).st_size
+                self._upload_to(resolve_parent(), local_file, file_size, remote_path,
+                                metadata, max_concurrency, chunk_size)
             
             return True, f"Successfully uploaded to {remote_path} ({file_size / (1024*1024):.2f} MB)"
             
+        except FileNotFoundError:
+            return False, f"Local file not found: {local_file_path}"
         except AzureError as e:
-            if "ContainerNotFound" in str(e):
-                return False, f"Container '{container_name}' not found."
-            elif "Authorization" in str(e):
-                return False, "Access denied. Check your Azure credentials."
-            else:
-                return False, f"Azure error: {str(e)}"
+            return self._upload_error(container_name, e)
         except Exception as e:
             return False, f"Error uploading file: {str(e)}"
 
-    def compute_remote_md5(self, container_name: str, remote_path: str, chunk_size: int = 1024 * 1024) -> Tuple[bool, str]:
+    def _upload_to(self, parent_client, local_file: BinaryIO, file_size: int, remote_path: str,
+                   metadata: Optional[Dict[str, str]] = None, max_concurrency: Optional[int] = None,
+                   chunk_size: Optional[int] = None) -> None:
+        """
+        Upload an open local file into an already resolved (and ensured) parent directory.
+        
+        Skips all path parsing and directory handling, so a batch sharing one directory
+        resolves it once. parent_client is a directory client, or the file system client
+        for files at the container root. Errors are raised to the caller.
+        """
+        # Hand the SDK the open handle so it streams blocks instead of the whole file
+        # being read into memory first
+        file_client = parent_client.get_file_client(os.path.basename(remote_path))
+        file_client.upload_data(
+            data=local_file,
+            length=file_size,
+            overwrite=True,
+            metadata=metadata,
+            max_concurrency=max_concurrency or self.max_concurrency,
+            chunk_size=chunk_size or self.upload_chunk_size
+        )
+
+    def _parent_resolver(self, container_name: str, directory_path: str) -> Callable[[], Any]:
+        """Return a thread-safe callable giving directory_path's parent client, resolved on first use only."""
+        lock = threading.Lock()
+        resolved = []
+        
+        def resolve():
+            with lock:
+                if not resolved:
+                    resolved.append(self._get_parent_client(container_name, directory_path))
+            return resolved[0]
+        return resolve
+
+    @staticmethod
+    def _upload_error(container_name: str, e: AzureError) -> Tuple[bool, str]:
+        """(False, message) for an AzureError raised while uploading."""
+        if "ContainerNotFound" in str(e):
+            return False, f"Container '{container_name}' not found."
+        elif "Authorization" in str(e):
+            return False, "Access denied. Check your Azure credentials."
+        else:
+            return False, f"Azure error: {str(e)}"
+
+    def upload_files(self, container_name: str, pairs: List[Tuple[str, str]],
+                     max_workers: int = 16) -> List[Tuple[bool, str]]:
+        """
+        Upload many local files concurrently (like `az storage fs file upload-batch`).
+        
+        Each parent directory is resolved and ensured once, by the first of its files that
+        opens successfully; the uploads themselves go through the _upload_to fast path.
+        
+        Args:
+            container_name: Name of the container/filesystem
+            pairs: (local_file_path, remote_path) for each file
+            max_workers: Number of files uploaded at the same time
+        
+        Returns:
+            List of (success: bool, message: str), in the same order as pairs
+        """
+        if self.service_client is None:
+            return [(False, "Not connected. Call connect() first.")] * len(pairs)
+        
+        # One lazy resolver per directory: the first file of a group that opens resolves
+        # (and creates) the directory, the rest of the group reuses the client
+        resolvers: Dict[str, Callable[[], Any]] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = []
+            for local_file_path, remote_path in pairs:
+                directory_path = os.path.dirname(remote_path).lstrip('/')
+                resolve_parent = resolvers.get(directory_path)
+                if resolve_parent is None:
+                    resolve_parent = resolvers[directory_path] = self._parent_resolver(container_name, directory_path)
+                futures.append(pool.submit(
+                    self._upload_path, container_name, local_file_path, remote_path, resolve_parent
+                ))
+            return [future.result() for future in futures]
+
+    def upload_file_with_hash(self, container_name: str, local_file_path: str, remote_path: str,
+                              algo: str = 'md5') -> Tuple[bool, str, Optional[str]]:
+        """
+        Upload a local file and checksum it in the same pass over its bytes.
+        
+        Args:
+            container_name: Name of the container/filesystem
+            local_file_path: Path to local file to upload
+            remote_path: Path in ADLS (e.g., '/raw_data/filename.parquet')
+            algo: Hash algorithm, one of utils.checksum.available_hash_algorithms()
+        
+        Returns:
+            Tuple of (success: bool, message: str, hex digest or None if the upload failed)
+        """
+        try:
+            hasher = new_hasher(algo)
+            with open(local_file_path, 'rb') as local_file:
+                reader = HashingReader(local_file, hasher)
+                success, message = self.upload_stream(
+                    container_name=container_name,
+                    stream=reader,
+                    remote_path=remote_path,
+                    length=os.fstat(local_file.fileno()).st_size
+                )
+        except FileNotFoundError:
+            return False, f"Local file not found: {local_file_path}", None
+        except (OSError, ValueError) as e:
+            return False, f"Error uploading file: {str(e)}", None
+        
+        return success, message, reader.hexdigest() if success else None
+    
+    def upload_stream(self, container_name: str, stream: BinaryIO, remote_path: str, length: int,
+                      metadata: Optional[Dict[str, str]] = None, max_concurrency: Optional[int] = None,
+                      chunk_size: Optional[int] = None) -> Tuple[bool, str]:
+        """
+        Upload from a readable stream (e.g., an S3 object body) without staging it on local disk.
+        
+        Args:
+            container_name: Name of the container/filesystem
+            stream: File-like object with read(); it is read sequentially, never seeked
+            remote_path: Path in ADLS (e.g., '/raw_data/filename.csv')
+            length: Number of bytes the stream will produce
+            metadata: Optional custom metadata stored with the file
+            max_concurrency: Parallel block uploads for this file (defaults to self.max_concurrency)
+            chunk_size: Size in bytes of each uploaded block (defaults to self.upload_chunk_size)
+        
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.service_client is None:
+            return False, "Not connected. Call connect() first."
+        
+        try:
+            parent_client = self._get_parent_client(
+                container_name, os.path.dirname(remote_path).lstrip('/')
+            )
+            file_client = parent_client.get_file_client(os.path.basename(remote_path))
+            file_client.upload_data(
+                data=stream,
+                length=length,
+                overwrite=True,
+                metadata=metadata,
+                max_concurrency=max_concurrency or self.max_concurrency,
+                chunk_size=chunk_size or self.upload_chunk_size
+            )
+            return True, f"Successfully uploaded to {remote_path} ({length / (1024*1024):.2f} MB)"
+            
+        except AzureError as e:
+            return self._upload_error(container_name, e)
+        except Exception as e:
+            return False, f"Error uploading stream: {str(e)}"
+
+    def set_file_metadata(self, container_name: str, remote_path: str, metadata: Dict[str, str]) -> Tuple[bool, str]:
+        """
+        Replace the custom metadata of an existing ADLS file.
+        
+        Args:
+            container_name: Name of the container/filesystem
+            remote_path: Path in ADLS (e.g., '/raw_data/filename.csv')
+            metadata: Metadata to store (e.g., {'checksum_md5': '...'})
+        
+        Returns:
+            Tuple of (success: bool, message: str)
+        """
+        if self.service_client is None:
+            return False, "Not connected. Call connect() first."
+        
+        try:
+            file_system_client = self._get_file_system_client(container_name)
+            file_system_client.get_file_client(remote_path).set_metadata(metadata)
+            return True, f"Metadata updated for {remote_path}"
+        except Exception as e:
+            return False, f"Error setting metadata: {str(e)}"
+
+    def _get_file_system_client(self, container_name: str):
+        """Return the (cached) file system client for a container."""
+        with self._file_system_lock:
+            file_system_client = self._file_system_clients.get(container_name)
+            if file_system_client is None:
+                # Builds a client object only; no request is sent while the lock is held
+                file_system_client = self.service_client.get_file_system_client(file_system=container_name)
+                self._file_system_clients[container_name] = file_system_client
+        return file_system_client
+    
+    def _get_parent_client(self, container_name: str, directory_path: str):
+        """
+        Return the client for creating files in directory_path, creating the directory if needed.
+        
+        That is a directory client, or the file system client when directory_path is empty
+        (the container root).
+        """
+        file_system_client = self._get_file_system_client(container_name)
+        if not directory_path:
+            return file_system_client
+        self._ensure_directory(container_name, directory_path)
+        return file_system_client.get_directory_client(directory_path)
+    
+    def _ensure_directory(self, container_name: str, directory_path: str) -> bool:
+        """
+        Create a directory unless this connector already knows it exists.
+        
+        Returns:
+            True if the directory was created by this call, False if it already existed
+        """
+        dir_key = (container_name, directory_path.strip('/'))
+        with self._ensured_lock:
+            if dir_key in self._ensured_dirs:
+                return False
+        
+        # The request runs outside the lock, so uploads into other directories don't queue
+        # behind it; threads racing on the same new directory may both send it, harmlessly
+        directory_client = self._get_file_system_client(container_name).get_directory_client(dir_key[1])
+        try:
+            directory_client.create_directory()
+            created = True
+        except ResourceExistsError:
+            # Directory already exists, that's fine
+            created = False
+        
+        with self._ensured_lock:
+            self._ensured_dirs.add(dir_key)
+        return created
+
+    def compute_remote_md5(self, container_name: str, remote_path: str,
+                           chunk_size: int = 4 * 1024 * 1024) -> Tuple[bool, str]:
         """
         Compute MD5 for a remote ADLS file by streaming its contents.
         
         Args:
             container_name: Name of the container/filesystem
             remote_path: Path to file in ADLS (e.g., '/raw_data/filename.parquet')
-            chunk_size: Size of chunks to read (default 1MB)
+            chunk_size: Size of each ranged GET (default 4MB)
         
         Returns:
             Tuple of (success: bool, md5_hex or error message: str)
         """
+        return self.compute_remote_hash(
+            container_name=container_name,
+            remote_path=remote_path,
+            algo='md5',
+            chunk_size=chunk_size
+        )
+    
+    def compute_remote_hash(self, container_name: str, remote_path: str, algo: str = 'md5',
+                            chunk_size: int = 4 * 1024 * 1024) -> Tuple[bool, str]:
+        """
+        Compute a checksum for a remote ADLS file by downloading it in parallel ranges.
+        
+        Up to max_concurrency ranged GETs are in flight at once; their results are
+        fed to a single hasher in file order, so any algorithm works and memory
+        stays bounded to max_concurrency * chunk_size.
+        
+        Args:
+            container_name: Name of the container/filesystem
+            remote_path: Path to file in ADLS (e.g., '/raw_data/filename.parquet')
+            algo: Hash algorithm, one of utils.checksum.available_hash_algorithms()
+            chunk_size: Size of each ranged GET (default 4MB)
+        
+        Returns:
+            Tuple of (success: bool, hex digest or error message: str)
+        """
         if self.service_client is None:
             return False, "Not connected. Call connect() first."
         
         try:
-            file_system_client = self.service_client.get_file_system_client(file_system=container_name)
+            file_system_client = self._get_file_system_client(container_name)
             file_client = file_system_client.get_file_client(remote_path)
             
-            # Download file in chunks to compute MD5
-            md5 = hashlib.md5()
-            downloader = file_client.download_file()
+            size = file_client.get_file_properties().size
+            hasher = new_hasher(algo)
+            
+            def fetch(offset: int) -> bytes:
+                return file_client.download_file(offset=offset, length=min(chunk_size, size - offset)).readall()
             
-            # Read file in chunks to avoid memory issues with large files
-            while True:
-                chunk = downloader.read(chunk_size)
-                if not chunk:
-                    break
-                md5.update(chunk)
+            offsets = iter(range(0, size, chunk_size))
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                in_flight = deque(pool.submit(fetch, offset) for offset in islice(offsets, self.max_concurrency))
+                while in_flight:
+                    data = in_flight.popleft().result()
+                    next_offset = next(offsets, None)
+                    if next_offset is not None:
+                        in_flight.append(pool.submit(fetch, next_offset))
+                    hasher.update(data)
             
-            return True, md5.hexdigest()
+            return True, hasher.hexdigest()
             
         except AzureError as e:
             if "NotFound" in str(e) or "does not exist" in str(e):
@@ -168,7 +451,7 @@ class ADLSConnector:
             else:
                 return False, f"Azure error while reading remote file: {str(e)}"
         except Exception as e:
-            return False, f"Error computing remote MD5: {str(e)}"
+            return False, f"Error computing remote hash: {str(e)}"
     
     def create_directory_if_not_exists(self, container_name: str, directory_path: str) -> Tuple[bool, str]:
         """
@@ -185,14 +468,9 @@ class ADLSConnector:
             return False, "Not connected. Call connect() first."
         
         try:
-            file_system_client = self.service_client.get_file_system_client(file_system=container_name)
-            directory_client = file_system_client.get_directory_client(directory_path)
-            
-            try:
-                directory_client.create_directory()
+            if self._ensure_directory(container_name, directory_path):
                 return True, f"Directory '{directory_path}' created"
-            except ResourceExistsError:
-                return True, f"Directory '{directory_path}' already exists"
+            return True, f"Directory '{directory_path}' already exists"
         except Exception as e:
             return False, f"Error creating directory: {str(e)}"
 
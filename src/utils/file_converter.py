@@ -3,37 +3,174 @@ File Conversion Utility
 Handles conversion of CSV/JSON files to Parquet format.
 """
 
+import codecs
 import pandas as pd
 import pyarrow as pa
-import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Tuple, List
+from typing import Any, Dict, List, Optional, Tuple
 
+# pyarrow.csv / pyarrow.json / pyarrow.parquet are imported where they are used. pyarrow's
+# core is loaded at import time regardless (pandas imports it), so this saves little.
 
-def _read_csv_with_fallbacks(path: str, encodings: List[str]) -> Tuple[bool, str, pd.DataFrame | None]:
+# Bytes of CSV each Arrow parser thread works on at a time
+CSV_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Common encodings to try when UTF-8 fails
+FALLBACK_ENCODINGS = ["utf-8", "utf-8-sig", "cp1252", "latin1"]
+
+# Bytes read from the start of a file to guess its encoding
+ENCODING_SNIFF_SIZE = 64 * 1024
+
+# CSVs larger than this are streamed block by block into the Parquet file instead of
+# being loaded whole, so memory stays bounded by about one row group of parsed rows
+CSV_STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+
+def _sniff_encoding(path: str) -> Optional[str]:
+    """
+    Pick the first of FALLBACK_ENCODINGS that decodes the file's first ENCODING_SNIFF_SIZE bytes.
+    
+    Decoding a small sample in each candidate is cheap, unlike re-parsing the
+    whole file per candidate. Returns None if none of them fit.
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(ENCODING_SNIFF_SIZE)
+    
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in FALLBACK_ENCODINGS:
+        try:
+            # Incremental decode, so a multi-byte character cut off by the sample size isn't an error
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _encodings_to_try(path: str) -> List[str]:
+    """FALLBACK_ENCODINGS with the sniffed encoding (if any) moved to the front."""
+    sniffed = _sniff_encoding(path)
+    if sniffed is None:
+        return list(FALLBACK_ENCODINGS)
+    sniffed_name = codecs.lookup(sniffed).name
+    return [sniffed] + [enc for enc in FALLBACK_ENCODINGS if codecs.lookup(enc).name != sniffed_name]
+
+
+def _has_undecoded_text(schema: pa.Schema) -> bool:
+    """Arrow types text that isn't valid in the read encoding as binary instead of raising."""
+    return any(pa.types.is_binary(field.type) for field in schema)
+
+
+def _parquet_write_options(compression: str, compression_level: Optional[int],
+                           use_dictionary: bool) -> Dict[str, Any]:
+    """Keyword args for pq.write_table/ParquetWriter; the level is dropped for codecs without one (snappy, none)."""
+    options = {'compression': compression, 'use_dictionary': use_dictionary}
+    if compression_level is not None and compression.lower() != 'none' \
+            and pa.Codec.supports_compression_level(compression):
+        options['compression_level'] = compression_level
+    return options
+
+
+def _stream_csv_to_parquet(path: str, output_file: str, encodings: List[str], write_options: Dict[str, Any],
+                           row_group_size: int) -> bool:
+    """
+    Convert a CSV to Parquet one block (record batch) at a time.
+    
+    Blocks are buffered until they add up to row_group_size rows and then written
+    as a row group, so memory stays bounded by one row group.
+    
+    Column types are inferred from the first block. Returns False if that turns out
+    wrong for a later block (or the file can't be streamed at all), in which case
+    the caller should fall back to reading the whole file.
+    """
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    
     for enc in encodings:
+        read_options = pa_csv.ReadOptions(encoding=enc, use_threads=True, block_size=CSV_BLOCK_SIZE)
         try:
-            df = pd.read_csv(path, encoding=enc)
-            return True, enc, df
+            reader = pa_csv.open_csv(path, read_options=read_options)
         except UnicodeDecodeError:
             continue
+        except pa.ArrowInvalid:
+            return False
+        
+        with reader:
+            if _has_undecoded_text(reader.schema):
+                continue
+            try:
+                with pq.ParquetWriter(output_file, reader.schema, **write_options) as writer:
+                    pending, pending_rows = [], 0
+                    for batch in reader:
+                        pending.append(batch)
+                        pending_rows += batch.num_rows
+                        if pending_rows >= row_group_size:
+                            # Write only whole row groups (matching the in-memory path) and carry
+                            # the remainder over into the next one
+                            table = pa.Table.from_batches(pending, schema=reader.schema)
+                            full_rows = pending_rows - pending_rows % row_group_size
+                            writer.write_table(table.slice(0, full_rows), row_group_size=row_group_size)
+                            rest = table.slice(full_rows)
+                            pending, pending_rows = rest.to_batches(), rest.num_rows
+                    if pending_rows:
+                        writer.write_table(pa.Table.from_batches(pending, schema=reader.schema),
+                                           row_group_size=row_group_size)
+                return True
+            except (pa.ArrowInvalid, UnicodeDecodeError):
+                return False
+    return False
+
+
+def _read_csv_with_fallbacks(path: str, encodings: List[str]) -> Tuple[bool, str, Optional[pa.Table]]:
+    import pyarrow.csv as pa_csv
+    
+    for enc in encodings:
+        try:
+            read_options = pa_csv.ReadOptions(encoding=enc, use_threads=True, block_size=CSV_BLOCK_SIZE)
+            table = pa_csv.read_csv(path, read_options=read_options)
+            if _has_undecoded_text(table.schema):
+                continue
+            return True, enc, table
+        except UnicodeDecodeError:
+            continue
+        except pa.ArrowInvalid:
+            # Arrow couldn't parse or infer it; let pandas have a go with the same encoding
+            try:
+                df = pd.read_csv(path, encoding=enc)
+                return True, enc, pa.Table.from_pandas(df, preserve_index=False)
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                return False, f"CSV read error: {str(e)}", None
         except Exception as e:
             return False, f"CSV read error: {str(e)}", None
     return False, "CSV decode error: tried encodings: " + ", ".join(encodings), None
 
 
-def _read_json_with_fallbacks(path: str, encodings: List[str]) -> Tuple[bool, str, pd.DataFrame | None]:
+def _read_json_with_fallbacks(path: str, encodings: List[str]) -> Tuple[bool, str, Optional[pa.Table]]:
+    import pyarrow.json as pa_json
+    
+    # Arrow only reads UTF-8 newline-delimited JSON. A single record is ambiguous
+    # (pandas reads one object of lists as several rows), so leave that to pandas.
+    try:
+        table = pa_json.read_json(path)
+        if table.num_rows > 1 and not _has_undecoded_text(table.schema):
+            return True, "utf-8", table
+    except (pa.ArrowInvalid, UnicodeDecodeError):
+        pass
+    
     for enc in encodings:
         try:
             df = pd.read_json(path, encoding=enc, lines=False)
-            return True, enc, df
+            return True, enc, pa.Table.from_pandas(df, preserve_index=False)
         except UnicodeDecodeError:
             continue
         except ValueError:
             # Try newline-delimited JSON
             try:
                 df = pd.read_json(path, encoding=enc, lines=True)
-                return True, enc, df
+                return True, enc, pa.Table.from_pandas(df, preserve_index=False)
             except Exception:
                 continue
         except Exception as e:
@@ -41,56 +178,77 @@ def _read_json_with_fallbacks(path: str, encodings: List[str]) -> Tuple[bool, st
     return False, "JSON decode error: tried encodings: " + ", ".join(encodings), None
 
 
-def convert_to_parquet(input_file: str, output_file: str) -> Tuple[bool, str]:
+def convert_to_parquet(input_file: str, output_file: str, compression: str = 'zstd',
+                       compression_level: Optional[int] = 3, use_dictionary: bool = True,
+                       row_group_size: int = 128 * 1024) -> Tuple[bool, str]:
     """
     Convert CSV or JSON file to Parquet format.
     
     Args:
         input_file: Path to input file (CSV or JSON)
         output_file: Path where Parquet file will be saved
+        compression: Parquet compression codec (e.g., 'zstd', 'snappy', 'none')
+        compression_level: Codec level (zstd 3 is typically 20-40% smaller than snappy);
+                           ignored by codecs without levels, None for the codec default
+        use_dictionary: Dictionary-encode columns (shrinks repetitive string columns)
+        row_group_size: Maximum rows per Parquet row group
     
     Returns:
         Tuple of (success: bool, message: str)
     """
+    import pyarrow.parquet as pq
+    
     try:
         input_path = Path(input_file)
         
-        # Check if file exists
-        if not input_path.exists():
+        # One stat both checks the file exists and gives its size
+        try:
+            input_bytes = input_path.stat().st_size
+        except FileNotFoundError:
             return False, f"Input file not found: {input_file}"
         
         # Determine file type by extension
         file_ext = input_path.suffix.lower()
 
-        # Common encodings to try when UTF-8 fails
-        encodings_to_try = ["utf-8", "utf-8-sig", "cp1252", "latin1"]
-
-        # Read file based on extension with encoding fallbacks
-        if file_ext == '.csv':
-            ok, used, df_or_msg = _read_csv_with_fallbacks(input_file, encodings_to_try)
-            if not ok:
-                return False, f"Conversion error: {df_or_msg}"
-            df = df_or_msg
-        elif file_ext == '.json':
-            ok, used, df_or_msg = _read_json_with_fallbacks(input_file, encodings_to_try)
-            if not ok:
-                return False, f"Conversion error: {df_or_msg}"
-            df = df_or_msg
-        else:
+        if file_ext not in ('.csv', '.json'):
             return False, f"Unsupported file type: {file_ext}. Only CSV and JSON are supported."
         
-        # Write to Parquet
-        df.to_parquet(output_file, engine='pyarrow', index=False)
+        # Checked up front: the Arrow readers' fallbacks would report an empty file as a read error
+        if input_bytes == 0:
+            return False, "Input file is empty or invalid."
+        
+        # Sniff the encoding up front so the file is normally parsed once; the rest of
+        # FALLBACK_ENCODINGS is only tried if that parse fails
+        encodings_to_try = _encodings_to_try(input_file)
+        write_options = _parquet_write_options(compression, compression_level, use_dictionary)
+        
+        # Large CSVs go straight to Parquet batch by batch; pyarrow's JSON reader can't stream.
+        # Everything else (or a CSV that fails to stream) is read whole below.
+        streamed = (
+            file_ext == '.csv'
+            and input_bytes > CSV_STREAMING_THRESHOLD
+            and _stream_csv_to_parquet(input_file, output_file, encodings_to_try, write_options, row_group_size)
+        )
+        
+        if not streamed:
+            # Read file straight into an Arrow table (multithreaded C++ parsers, pandas as fallback)
+            if file_ext == '.csv':
+                ok, used_or_msg, table = _read_csv_with_fallbacks(input_file, encodings_to_try)
+            else:
+                ok, used_or_msg, table = _read_json_with_fallbacks(input_file, encodings_to_try)
+            if not ok:
+                return False, f"Conversion error: {used_or_msg}"
+            
+            # Write to Parquet (compressed + dictionary-encoded, so fewer bytes to upload)
+            pq.write_table(table, output_file, row_group_size=row_group_size, **write_options)
         
         # Get file sizes for info
-        input_size = input_path.stat().st_size / (1024 * 1024)  # MB
+        input_size = input_bytes / (1024 * 1024)  # MB
         output_path = Path(output_file)
         output_size = output_path.stat().st_size / (1024 * 1024)  # MB
         
         return True, f"Converted to Parquet: {input_size:.2f} MB → {output_size:.2f} MB"
         
-    except pd.errors.EmptyDataError:
-        return False, "Input file is empty or invalid."
     except Exception as e:
         return False, f"Conversion error: {str(e)}"
 
@@ -3,11 +3,10 @@ File Manager Utility
 Handles temporary file creation and cleanup.
 """
 
-import os
 import tempfile
 import shutil
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional
 
 
 class TempFileManager:
@@ -27,9 +26,6 @@ class TempFileManager:
         else:
             # Create a temporary directory
             self.temp_dir = Path(tempfile.mkdtemp(prefix="s3_adls_connector_"))
-        
-        self.created_files: List[str] = []
-        self.created_dirs: List[str] = []
     
     def create_temp_file(self, filename: str) -> str:
         """
@@ -48,20 +44,11 @@ class TempFileManager:
     
     def cleanup(self):
         """Delete all temporary files and directories."""
-        # Delete all created files
-        for file_path in self.created_files:
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except Exception as e:
-                print(f"Warning: Could not delete file {file_path}: {e}")
-        
-        # Delete temp directory if we created it
-        try:
-            if self.temp_dir.exists() and self.temp_dir.is_dir():
-                shutil.rmtree(self.temp_dir)
-        except Exception as e:
-            print(f"Warning: Could not delete directory {self.temp_dir}: {e}")
+        # Every temp file lives under temp_dir, so one rmtree removes them all
+        # (one unlink per entry, no separate exists/remove pass first)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        if self.temp_dir.exists():
+            print(f"Warning: Could not fully delete directory {self.temp_dir}")
     
     def get_temp_dir(self) -> str:
         """Get the temporary directory path."""